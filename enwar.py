@@ -1,19 +1,36 @@
+import asyncio
 import spacy
-from flask import Flask, request, jsonify
-from heapq import nlargest
+from flask import Flask, Response, request
+import orjson
+from numba import njit
+import numpy as np
 from camel_tools.tokenizers.word import simple_word_tokenize
 from camel_tools.utils.dediac import dediac_ar
-from langdetect import detect
 import fitz  # PyMuPDF
 from docx import Document
+from lxml import etree
+from collections import Counter
+from functools import lru_cache
+import hashlib
+import math
+import mmap
 import os
-import re
+import queue
+import tempfile
+import threading
+import time
+import zipfile
 from io import BytesIO
 
 app = Flask(__name__)
 
-# Load the English language model
-nlp_en = spacy.load('en_core_web_sm')
+# Load the English language model. The summarizer only needs tokens and
+# sentence boundaries, so every trained component is disabled and a
+# rule-based sentencizer provides `doc.sents` instead.
+nlp_en = spacy.load('en_core_web_sm', disable=[
+    'tok2vec', 'tagger', 'parser', 'attribute_ruler', 'lemmatizer', 'ner'])
+sentencizer_en = nlp_en.add_pipe('sentencizer')
+_STOPS = frozenset(nlp_en.Defaults.stop_words)
 
 
 def normalize_frequencies(word_frequencies):
@@ -24,142 +41,478 @@ def normalize_frequencies(word_frequencies):
     return word_frequencies
 
 
-def calculate_sentence_scores(doc, word_frequencies):
-    """Calculate scores for each sentence based on word frequencies."""
-    sentence_scores = {}
-    for sentence in doc.sents:
-        for word in sentence:
-            word_lower = word.text.lower()
-            if word_lower in word_frequencies:
-                sentence_scores[sentence] = sentence_scores.get(
-                    sentence, 0) + word_frequencies[word_lower]
+# Below this many tokens, per-sentence Python sums beat setting up the
+# vectorized scoring arrays.
+SMALL_DOC_TOKENS = 200
+
+
+def calculate_sentence_scores(sents, word_frequencies):
+    """Calculate scores for each sentence based on word frequencies.
+
+    Returns a float32 array holding the score of each sentence in `sents`.
+    """
+    lengths = [len(sentence) for sentence in sents]
+    frequency_of = word_frequencies.get
+    if sum(lengths) < SMALL_DOC_TOKENS:
+        return np.array([sum(frequency_of(word.lower_, 0.0) for word in sentence)
+                         for sentence in sents], dtype=np.float32)
+
+    sent_ids = np.repeat(np.arange(len(sents)), lengths)
+    token_scores = np.fromiter(
+        (frequency_of(word.lower_, 0.0)
+         for sentence in sents for word in sentence),
+        dtype=np.float32, count=sum(lengths))
+    sentence_scores = np.zeros(len(sents), dtype=np.float32)
+    np.add.at(sentence_scores, sent_ids, token_scores)
     return sentence_scores
 
 
-def summarize_text_english(text, summary_ratio=0.3):
-    """Summarize English text."""
-    doc = nlp_en(text)
-    word_frequencies = {}
-    for word in doc:
-        word_lower = word.text.lower()
-        if word_lower not in nlp_en.Defaults.stop_words and not word.is_punct:
-            word_frequencies[word_lower] = word_frequencies.get(
-                word_lower, 0) + 1
+def top_k_indices(scores, k):
+    """Return the indices of the `k` highest scores, highest first.
+
+    Ties are broken by position, earliest first, like `heapq.nlargest`.
+    """
+    k = min(k, scores.shape[0])
+    if k == 0:
+        return np.empty(0, dtype=np.intp)
+    # Partition to find the k-th largest score in O(n), then take every score
+    # above it plus the earliest of the entries tied with it.
+    kth = np.partition(scores, -k)[-k]
+    above = np.flatnonzero(scores > kth)
+    tied = np.flatnonzero(scores == kth)[:k - above.size]
+    top = np.concatenate((above, tied))
+    return top[np.lexsort((top, -scores[top]))]
+
+
+def summarize_doc_english(doc, summary_ratio=0.3):
+    """Summarize an English text already processed by `nlp_en`."""
+    word_frequencies = Counter([
+        word.lower_ for word in doc
+        if not word.is_punct and word.lower_ not in _STOPS])
 
     if not word_frequencies:
         return ""
 
     word_frequencies = normalize_frequencies(word_frequencies)
-    sentence_scores = calculate_sentence_scores(doc, word_frequencies)
+    sents = tuple(doc.sents)
+    sentence_scores = calculate_sentence_scores(sents, word_frequencies)
 
-    num_sentences = max(1, int(len(list(doc.sents)) * summary_ratio))
-    summary_sentences = nlargest(
-        num_sentences, sentence_scores, key=sentence_scores.get)
-    final_summary = ' '.join([sentence.text for sentence in summary_sentences])
+    # Only sentences containing at least one counted word are candidates.
+    scored = np.flatnonzero(sentence_scores > 0)
+    num_sentences = max(1, int(len(sents) * summary_ratio))
+    summary_sentences = scored[
+        top_k_indices(sentence_scores[scored], num_sentences)]
+    final_summary = ' '.join(sents[i].text for i in summary_sentences)
 
     return final_summary
 
 
+def summarize_text_english(text, summary_ratio=0.3):
+    """Summarize English text."""
+    doc = sentencizer_en(nlp_en.tokenizer(text))
+    return summarize_doc_english(doc, summary_ratio)
+
+
+class EnglishSummaryBatcher:
+    """Coalesce concurrent English requests into a single `nlp_en.pipe` call.
+
+    Request threads enqueue their text and block until a background worker
+    has collected up to `max_batch_size` items (or waited `max_wait` seconds
+    for more to arrive), run them through spaCy as one batch and filled in
+    the results. Batches of several texts are spread over up to
+    `max_processes` processes; spaCy starts a fresh set of them for every
+    batch, see the note on `SPACY_N_PROCESS` below.
+    """
+
+    def __init__(self, max_batch_size=32, max_wait=0.02, max_processes=1):
+        self.max_batch_size = max_batch_size
+        self.max_wait = max_wait
+        self.max_processes = max(1, max_processes)
+        self._queue = queue.Queue()
+        self._lock = threading.Lock()
+        self._worker = None
+
+    def summarize(self, text, summary_ratio=0.3):
+        """Summarize `text`, blocking until its batch has been processed."""
+        self._ensure_worker()
+        done = threading.Event()
+        result = {}
+        self._queue.put((text, summary_ratio, done, result))
+        done.wait()
+        if 'error' in result:
+            raise result['error']
+        return result['summary']
+
+    def _ensure_worker(self):
+        # Started lazily so that forked server workers each get their own thread.
+        with self._lock:
+            if self._worker is None or not self._worker.is_alive():
+                self._worker = threading.Thread(target=self._run, daemon=True)
+                self._worker.start()
+
+    def _collect_batch(self):
+        batch = [self._queue.get()]
+        deadline = time.monotonic() + self.max_wait
+        while len(batch) < self.max_batch_size:
+            remaining = deadline - time.monotonic()
+            if remaining <= 0:
+                break
+            try:
+                batch.append(self._queue.get(timeout=remaining))
+            except queue.Empty:
+                break
+        return batch
+
+    def _run(self):
+        while True:
+            batch = self._collect_batch()
+            try:
+                if len(batch) == 1:
+                    # Nothing to batch: skip pipe()'s per-call overhead.
+                    text, summary_ratio, _, result = batch[0]
+                    result['summary'] = summarize_text_english(
+                        text, summary_ratio)
+                    continue
+                # Every process started must receive at least one batch.
+                batch_size = max(4, math.ceil(len(batch) / self.max_processes))
+                n_process = min(self.max_processes,
+                                math.ceil(len(batch) / batch_size))
+                docs = nlp_en.pipe([text for text, _, _, _ in batch],
+                                   n_process=n_process, batch_size=batch_size)
+                for (_, summary_ratio, _, result), doc in zip(batch, docs):
+                    result['summary'] = summarize_doc_english(doc, summary_ratio)
+            except Exception as e:
+                for _, _, _, result in batch:
+                    if 'summary' not in result:
+                        result['error'] = e
+            finally:
+                for _, _, done, _ in batch:
+                    done.set()
+
+
+# SPACY_N_PROCESS > 1 makes nlp_en.pipe fork new worker processes for every
+# micro-batch, from the batcher thread while request threads are running.
+# Forking while other threads may hold locks can deadlock, and the view
+# always runs work on asyncio.to_thread threads, so this is unsafe under any
+# server configuration. On 20 ms batches process start-up also costs more
+# than batching saves. Leave it at the default of 1 outside experiments.
+english_batcher = EnglishSummaryBatcher(
+    max_processes=int(os.environ.get('SPACY_N_PROCESS', 1)))
+
+
+@njit(cache=True)
+def score_sentences_by_ids(ids, sent_ids, vocab_size, num_sents):
+    """Score sentences by the normalized frequencies of their token ids.
+
+    `sent_ids[i]` is the sentence of token `ids[i]`, or -1 for a token that
+    counts toward the frequencies but belongs to no sentence. Returns the
+    sentence scores and the number of scored tokens in each sentence.
+    """
+    counts = np.zeros(vocab_size, dtype=np.int32)
+    for i in range(ids.shape[0]):
+        counts[ids[i]] += 1
+    frequencies = counts / counts.max()
+
+    scores = np.zeros(num_sents)
+    sizes = np.zeros(num_sents, dtype=np.int32)
+    for i in range(ids.shape[0]):
+        s = sent_ids[i]
+        if s >= 0:
+            scores[s] += frequencies[ids[i]]
+            sizes[s] += 1
+    return scores, sizes
+
+
 def summarize_text_arabic(text, summary_ratio=0.3):
     """Summarize Arabic text."""
     text = dediac_ar(text)  # Remove diacritics
-    words = simple_word_tokenize(text)
-    word_frequencies = {}
-    for word in words:
-        word_frequencies[word] = word_frequencies.get(word, 0) + 1
 
-    if not word_frequencies:
+    # Tokenize the whole text once, mapping tokens to integer ids so counting
+    # and scoring can run in compiled code. Sentences are delimited by the
+    # '.' tokens in the stream.
+    token_ids = {}
+    ids = np.fromiter((token_ids.setdefault(word, len(token_ids))
+                       for word in simple_word_tokenize(text)), dtype=np.int32)
+    is_end = ids == token_ids.get('.', -1)
+    if is_end.all():
         return ""
 
-    word_frequencies = normalize_frequencies(word_frequencies)
-
+    # Sentence index of every token; the '.' separators count toward the
+    # frequencies but not toward any sentence score.
+    num_sents = int(is_end.sum()) + 1
+    sent_ids = np.cumsum(is_end) - is_end
+    sent_ids[is_end] = -1
+    sentence_scores, sentence_sizes = score_sentences_by_ids(
+        ids, sent_ids, len(token_ids), num_sents)
+
+    # Only sentences containing at least one token are candidates.
+    scored = np.flatnonzero(sentence_sizes)
+    num_sentences = max(1, int(num_sents * summary_ratio))
+    summary_sentences = scored[
+        top_k_indices(sentence_scores[scored], num_sentences)]
     sentences = text.split('.')
-    sentence_scores = {}
-    for sentence in sentences:
-        sentence_words = simple_word_tokenize(sentence)
-        for word in sentence_words:
-            if word in word_frequencies:
-                sentence_scores[sentence] = sentence_scores.get(
-                    sentence, 0) + word_frequencies[word]
-
-    num_sentences = max(1, int(len(sentences) * summary_ratio))
-    summary_sentences = nlargest(
-        num_sentences, sentence_scores, key=sentence_scores.get)
-    final_summary = ' '.join(summary_sentences)
+    final_summary = ' '.join(sentences[i] for i in summary_sentences)
 
     return final_summary
 
 
+def detect_en_ar(text, sample_size=4096):
+    """Detect whether text is English ('en') or Arabic ('ar').
+
+    Counts Arabic-block (U+0600-U+06FF) and ASCII letters in a leading
+    sample of the text. Returns None when it contains neither.
+    """
+    sample = text[:sample_size].encode('utf-32-le', errors='surrogatepass')
+    codepoints = np.frombuffer(sample, dtype=np.uint32)
+    arabic = np.count_nonzero((codepoints >= 0x600) & (codepoints <= 0x6FF))
+    latin = np.count_nonzero(((codepoints >= 0x41) & (codepoints <= 0x5A)) |
+                             ((codepoints >= 0x61) & (codepoints <= 0x7A)))
+    if arabic > latin:
+        return 'ar'
+    if latin > 0:
+        return 'en'
+    return None
+
+
 def summarize_text(text, lang='en', summary_ratio=0.3):
     """Summarize text based on the language."""
     if lang == 'en':
-        return summarize_text_english(text, summary_ratio)
+        return english_batcher.summarize(text, summary_ratio)
     elif lang == 'ar':
         return summarize_text_arabic(text, summary_ratio)
     else:
         return "Language not supported"
 
 
+class HashedText:
+    """A text that compares and hashes by its content digest.
+
+    Lets summaries be cached per text content without the cache keeping
+    the text alive.
+    """
+
+    __slots__ = ('digest', 'text')
+
+    def __init__(self, text):
+        self.digest = hashlib.blake2b(
+            text.encode('utf-8'), digest_size=16).digest()
+        self.text = text
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __eq__(self, other):
+        return isinstance(other, HashedText) and self.digest == other.digest
+
+
+@lru_cache(maxsize=512)
+def _summarize_cached(hashed_text, lang, summary_ratio):
+    try:
+        return summarize_text(hashed_text.text, lang, summary_ratio)
+    finally:
+        hashed_text.text = None  # only the digest is needed once cached
+
+
+def summarize_text_cached(text, lang='en', summary_ratio=0.3):
+    """Summarize text, reusing the result for previously seen inputs."""
+    return _summarize_cached(HashedText(text), lang, summary_ratio)
+
+
+_CLEAN_TABLE = str.maketrans('', '', '\r\n"')
+
+
 def clean_response(text):
     """Clean response text by removing unwanted characters."""
-    return re.sub(r'[\r\n"]', '', text)
+    return text.translate(_CLEAN_TABLE)
+
+
+# Plain-text extraction flags: keep whitespace and clip to the media box, but
+# skip ligature preservation and image handling.
+PDF_TEXT_FLAGS = fitz.TEXT_PRESERVE_WHITESPACE | fitz.TEXT_MEDIABOX_CLIP
 
 
 def extract_text_from_pdf(file):
-    """Extract text from a PDF file."""
-    doc = fitz.open(stream=file.read(), filetype="pdf")
-    text = ""
-    for page in doc:
-        text += page.get_text()
-    return text
+    """Extract text from a PDF file.
+
+    Uploads that Werkzeug has already spooled to disk are memory-mapped
+    instead of being read into a bytes copy; in-memory uploads are read
+    as before.
+    """
+    stream = getattr(file, 'stream', file)
+    mapped = view = None
+    try:
+        # Asking an in-memory SpooledTemporaryFile for its fileno() would
+        # force it onto disk, so only map spools that are already there.
+        # `_rolled` is a private attribute; if it ever disappears, spools
+        # are treated as in memory and read instead.
+        if isinstance(stream, tempfile.SpooledTemporaryFile):
+            on_disk = getattr(stream, '_rolled', False)
+        else:
+            on_disk = True
+        if on_disk:
+            try:
+                mapped = mmap.mmap(stream.fileno(), 0, access=mmap.ACCESS_READ)
+            except (AttributeError, OSError, ValueError):
+                mapped = None
+        if mapped is not None:
+            data = view = memoryview(mapped)
+        else:
+            data = stream.read()
+        with fitz.open(stream=data, filetype="pdf") as doc:
+            return ''.join(page.get_text("text", flags=PDF_TEXT_FLAGS)
+                           for page in doc)
+    finally:
+        if view is not None:
+            view.release()
+        if mapped is not None:
+            mapped.close()
+
+
+WORD_NS = '{http://schemas.openxmlformats.org/wordprocessingml/2006/main}'
+DOCX_RUN_BREAKS = {
+    WORD_NS + 'tab': '\t',
+    WORD_NS + 'br': '\n',
+    WORD_NS + 'cr': '\n',
+}
 
 
 def extract_text_from_docx(file):
-    """Extract text from a Word file."""
-    doc = Document(file)
-    text = ""
-    for para in doc.paragraphs:
-        text += para.text + "\n"
-    return text
+    """Extract text from a Word file.
+
+    Streams the text nodes out of `word/document.xml` instead of building
+    the full python-docx object model, falling back to python-docx when the
+    package does not use the standard document part name. Unlike python-docx
+    `Document.paragraphs`, the text of table cells is included; text boxes
+    are left out, as they are by python-docx.
+    """
+    stream = getattr(file, 'stream', file)
+    try:
+        with zipfile.ZipFile(stream) as package, \
+                package.open('word/document.xml') as document:
+            parts = []
+            # Word stores text-box content twice (in mc:Choice and again in
+            # mc:Fallback), so everything inside w:txbxContent is skipped.
+            textbox_depth = 0
+            for event, element in etree.iterparse(
+                    document, events=('start', 'end'),
+                    tag=[WORD_NS + 't', WORD_NS + 'p', WORD_NS + 'txbxContent',
+                         *DOCX_RUN_BREAKS]):
+                if element.tag == WORD_NS + 'txbxContent':
+                    textbox_depth += 1 if event == 'start' else -1
+                elif event == 'start' or textbox_depth:
+                    continue
+                elif element.tag == WORD_NS + 't':
+                    parts.append(element.text or '')
+                elif element.tag == WORD_NS + 'p':
+                    parts.append('\n')
+                    # Drop the finished paragraph and everything before it
+                    # so the parsed tree does not grow with the document.
+                    element.clear()
+                    while element.getprevious() is not None:
+                        del element.getparent()[0]
+                elif element.getparent().tag == WORD_NS + 'r':
+                    # Tab stops in paragraph properties are `w:tab` too.
+                    parts.append(DOCX_RUN_BREAKS[element.tag])
+            return ''.join(parts)
+    except KeyError:
+        stream.seek(0)
+        doc = Document(stream)
+        return '\n'.join(para.text for para in doc.paragraphs)
+
+
+class HashedUpload:
+    """An uploaded file that compares and hashes by its content digest.
+
+    Lets extraction results be cached per file content without the cache
+    keeping the uploaded data alive.
+    """
+
+    __slots__ = ('digest', 'file')
+
+    def __init__(self, file, chunk_size=1 << 16):
+        hasher = hashlib.blake2b(digest_size=16)
+        for chunk in iter(lambda: file.stream.read(chunk_size), b''):
+            hasher.update(chunk)
+        file.stream.seek(0)
+        self.digest = hasher.digest()
+        self.file = file
+
+    def __hash__(self):
+        return hash(self.digest)
+
+    def __eq__(self, other):
+        return isinstance(other, HashedUpload) and self.digest == other.digest
+
+
+@lru_cache(maxsize=128)
+def _extract_text_cached(upload, extension):
+    try:
+        if extension == '.pdf':
+            return extract_text_from_pdf(upload.file)
+        if extension == '.docx':
+            return extract_text_from_docx(upload.file)
+        return upload.file.read().decode('utf-8')
+    finally:
+        upload.file = None  # only the digest is needed once cached
+
+
+def extract_text(uploaded_file, extension):
+    """Extract text from an uploaded file, reusing results for repeat uploads."""
+    return _extract_text_cached(HashedUpload(uploaded_file), extension)
+
+
+def clear_caches():
+    """Drop all cached extraction and summarization results."""
+    _extract_text_cached.cache_clear()
+    _summarize_cached.cache_clear()
+
+
+def json_response(payload, status):
+    """Build a JSON response serialized with orjson."""
+    return Response(orjson.dumps(payload), status=status,
+                    mimetype='application/json')
 
 
 @app.route('/summarize', methods=['POST'])
-def handle_summarize_request():
-    """Handle summarization request."""
+async def handle_summarize_request():
+    """Handle summarization request.
+
+    Extraction and summarization run in worker threads so the blocking
+    file parsing and spaCy work do not hold the request's event loop.
+    """
     try:
         uploaded_file = request.files.get('file')
         if not uploaded_file or uploaded_file.filename == '':
-            return jsonify({'status': 'fail', 'error': 'No file uploaded or selected'}), 400
+            return json_response({'status': 'fail', 'error': 'No file uploaded or selected'}, 400)
 
         filename = uploaded_file.filename.lower()
-        if filename.endswith('.pdf'):
-            text = extract_text_from_pdf(uploaded_file)
-        elif filename.endswith('.docx'):
-            text = extract_text_from_docx(uploaded_file)
-        elif filename.endswith('.txt'):
-            text = uploaded_file.read().decode('utf-8')
-        else:
-            return jsonify({'status': 'fail', 'error': 'Unsupported file type'}), 400
+        extension = next((suffix for suffix in ('.pdf', '.docx', '.txt')
+                          if filename.endswith(suffix)), None)
+        if extension is None:
+            return json_response({'status': 'fail', 'error': 'Unsupported file type'}, 400)
+
+        text = await asyncio.to_thread(extract_text, uploaded_file, extension)
 
-        language = detect(text)
+        language = detect_en_ar(text)
 
         if language not in ['en', 'ar']:
-            return jsonify({'status': 'fail', 'error': 'Language not supported'}), 400
+            return json_response({'status': 'fail', 'error': 'Language not supported'}, 400)
 
-        summary = summarize_text(text, lang=language)
+        summary = await asyncio.to_thread(
+            summarize_text_cached, text, lang=language)
         cleaned_summary = clean_response(summary)
 
-        return jsonify({
+        return json_response({
             'status': 'success',
             'summary': cleaned_summary,
             'lengthSUMMARY': len(cleaned_summary),
             'lengthTEXT': len(text),
             'language': language,
             "filename": filename
-        }), 200
+        }, 200)
     except Exception as e:
         # print(e)
-        return jsonify({'status': 'fail', 'error': f'Something went wrong ,please try again.'}), 500
+        return json_response({'status': 'fail', 'error': f'Something went wrong ,please try again.'}, 500)
 
 
 if __name__ == "__main__":
@@ -0,0 +1,14 @@
+"""WSGI entry point for serving the summarizer in production.
+
+Run with gunicorn, preloading the app so the spaCy model is loaded once in
+the master process and shared copy-on-write by the forked workers:
+
+    gunicorn -w $(nproc) --preload --threads 2 -b 0.0.0.0:$PORT wsgi:app
+"""
+import os
+
+# Keep each worker's numeric libraries single-threaded so that several
+# workers do not oversubscribe the CPU cores.
+os.environ.setdefault('OMP_NUM_THREADS', '1')
+
+from enwar import app  # noqa: E402